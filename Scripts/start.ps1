@@ -11,7 +11,7 @@ Write-Host "Project Root: $projectDir" -ForegroundColor Cyan
 Write-Host "Starting Backend..." -ForegroundColor Green
 $backendDir = Join-Path -Path $projectDir -ChildPath "backend"
 
-$backendProcess = Start-Process -FilePath "uv" -ArgumentList "run", "uvicorn", "main:app", "--reload" -WorkingDirectory $backendDir -PassThru -NoNewWindow
+$backendProcess = Start-Process -FilePath "uv" -ArgumentList "run", "uvicorn", "main:app", "--reload", "--http", "httptools" -WorkingDirectory $backendDir -PassThru -NoNewWindow
 Write-Host "Backend running with PID: $($backendProcess.Id)" -ForegroundColor DarkGray
 
 # Start Frontend
@@ -13,7 +13,7 @@ trap 'kill 0' INT
 # Start Backend
 echo "Starting Backend..."
 cd "$PROJECT_ROOT/backend"
-uv run uvicorn main:app --reload &
+uv run uvicorn main:app --reload --loop uvloop --http httptools &
 
 # Start Frontend
 echo "Starting Frontend..."
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import event
 import os
 
 # Ensure data directory exists
@@ -10,11 +11,84 @@ sqlite_file_name = "local_yuque.db"
 sqlite_url = f"sqlite:///{os.path.join(DATA_DIR, sqlite_file_name)}"
 
 connect_args = {"check_same_thread": False}
-engine = create_engine(sqlite_url, connect_args=connect_args)
+# query_cache_size bounds SQLAlchemy's LRU of compiled statements, so the
+# SQL for repeated selects/updates is generated once and reused
+engine = create_engine(
+    sqlite_url,
+    connect_args=connect_args,
+    pool_size=20,
+    max_overflow=40,
+    query_cache_size=1200,
+)
+
+# Applied on every new connection: WAL lets readers run alongside the writer,
+# NORMAL sync is safe under WAL, and busy_timeout avoids "database is locked".
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+# Full-text index over node.title/content, kept in sync by triggers.
+# The trigram tokenizer gives substring matches (like the old LIKE '%q%'),
+# which also works for CJK text that unicode61 can't segment.
+FTS_SCHEMA = (
+    """
+    CREATE TRIGGER IF NOT EXISTS node_ai AFTER INSERT ON node BEGIN
+        INSERT INTO node_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS node_ad AFTER DELETE ON node BEGIN
+        INSERT INTO node_fts(node_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS node_au AFTER UPDATE ON node BEGIN
+        INSERT INTO node_fts(node_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+        INSERT INTO node_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content);
+    END
+    """,
+)
+
+def create_fts_index():
+    with engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'node_fts'"
+        ).first()
+        if not exists:
+            conn.exec_driver_sql(
+                "CREATE VIRTUAL TABLE node_fts USING fts5("
+                "title, content, content='node', content_rowid='rowid', tokenize='trigram')"
+            )
+            # Index rows that existed before the FTS table was introduced
+            conn.exec_driver_sql("INSERT INTO node_fts(node_fts) VALUES ('rebuild')")
+        for statement in FTS_SCHEMA:
+            conn.exec_driver_sql(statement)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    # create_all skips existing tables, so add indexes introduced later
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        # Superseded by ix_node_parent_id_id; only left on older databases
+        conn.exec_driver_sql("DROP INDEX IF EXISTS ix_node_parent_id")
+    create_fts_index()
 
 def get_session():
-    with Session(engine) as session:
+    # One session per request; objects stay readable after commit so
+    # services can return them without a refresh SELECT.
+    with Session(engine, expire_on_commit=False) as session:
         yield session
@@ -1,9 +1,13 @@
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, Request, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from services.storage import StorageService
-from database import create_db_and_tables
-from pydantic import BaseModel
+from database import create_db_and_tables, get_session
+from pydantic import BaseModel, ConfigDict
+from sqlmodel import Session
 from typing import Optional
+from uuid import UUID
+import sys
 import uvicorn
 
 app = FastAPI()
@@ -17,6 +21,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress document and tree payloads; small JSON replies stay uncompressed
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Initialize Storage
 storage = StorageService()
 
@@ -29,7 +36,10 @@ class CreateNodeRequest(BaseModel):
     title: str
     type: str
 
+# Autosave hits this on every edit; parsed by pydantic-core (Pydantic v2)
 class SaveFileRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     content: str
 
 @app.on_event("startup")
@@ -37,16 +47,26 @@ def on_startup():
     create_db_and_tables()
 
 @app.get("/api/kb")
-async def get_tree():
+async def get_tree(request: Request, session: Session = Depends(get_session)):
     try:
-        return storage.get_tree()
+        # Read the ETag before the tree so a concurrent mutation can only
+        # make the tag older than the payload, never newer.
+        etag = storage.tree_etag
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        # The tree is cached pre-serialized, so send the bytes as-is
+        return Response(
+            content=storage.get_tree_json(session),
+            media_type="application/json",
+            headers={"ETag": etag},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/files/{node_id}")
-async def get_file(node_id: str):
+async def get_file(node_id: UUID, session: Session = Depends(get_session)):
     try:
-        content = storage.read_node(node_id)
+        content = storage.read_node(session, str(node_id))
         return {"content": content}
     except ValueError:
         raise HTTPException(status_code=404, detail="File not found")
@@ -54,9 +74,9 @@ async def get_file(node_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/files/{node_id}")
-async def save_file(node_id: str, request: SaveFileRequest):
+async def save_file(node_id: UUID, request: SaveFileRequest, session: Session = Depends(get_session)):
     try:
-        storage.save_node_content(node_id, request.content)
+        storage.save_node_content(session, str(node_id), request.content)
         return {"success": True}
     except ValueError:
         raise HTTPException(status_code=404, detail="Node not found")
@@ -64,29 +84,31 @@ async def save_file(node_id: str, request: SaveFileRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/create")
-async def create_node(request: CreateNodeRequest):
+async def create_node(request: CreateNodeRequest, session: Session = Depends(get_session)):
     try:
-        new_node = storage.create_node(request.parentId, request.type, request.title)
+        new_node = storage.create_node(session, request.parentId, request.type, request.title)
         return {"success": True, "node": new_node}
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail=str(e))
 
 class RenameRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     title: str
 
 @app.post("/api/delete/{node_id}")
-async def delete_node(node_id: str):
+async def delete_node(node_id: UUID, session: Session = Depends(get_session)):
     try:
-        storage.delete_node(node_id)
+        storage.delete_node(session, str(node_id))
         return {"success": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/rename/{node_id}")
-async def rename_node(node_id: str, request: RenameRequest):
+async def rename_node(node_id: UUID, request: RenameRequest, session: Session = Depends(get_session)):
     try:
-        node = storage.rename_node(node_id, request.title)
+        node = storage.rename_node(session, str(node_id), request.title)
         return {"success": True, "node": node}
     except ValueError:
         raise HTTPException(status_code=404, detail="Node not found")
@@ -94,12 +116,15 @@ async def rename_node(node_id: str, request: RenameRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/search")
-async def search_nodes(q: str):
+async def search_nodes(q: str, session: Session = Depends(get_session)):
     try:
-        results = storage.search_nodes(q)
+        results = storage.search_nodes(session, q)
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # uvloop and httptools ship with uvicorn[standard]; uvloop has no Windows build.
+    # Keep a single worker: the tree cache in StorageService is per process.
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, loop=loop, http="httptools")
@@ -1,14 +1,18 @@
 from typing import Optional
 from sqlmodel import Field, SQLModel
+from sqlalchemy import Index
 from datetime import datetime
 
 class NodeBase(SQLModel):
     title: str
     type: str # 'kb', 'folder', 'doc'
-    parent_id: Optional[str] = Field(default=None, index=True)
+    parent_id: Optional[str] = Field(default=None)
     content: Optional[str] = Field(default=None)
 
 class Node(NodeBase, table=True):
+    # Covers child lookups and the recursive subtree walk without touching rows
+    __table_args__ = (Index("ix_node_parent_id_id", "parent_id", "id"),)
+
     id: Optional[str] = Field(default=None, primary_key=True)
     created_at: float = Field(default_factory=lambda: datetime.now().timestamp() * 1000)
 
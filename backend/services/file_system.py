@@ -1,72 +1,99 @@
 import os
-import aiofiles
 import asyncio
-from typing import List, Optional, Dict, Literal
+from typing import List, Optional, Dict, Literal, Tuple
+
+SCAN_CONCURRENCY = 8
 
 class FileSystemService:
     def __init__(self, root_dir: str):
         self.root_dir = root_dir
+        # root_dir never changes, so resolve it once; the trailing separator
+        # stops "/data_evil" from passing as being inside "/data"
+        self._abs_root = os.path.abspath(root_dir) + os.sep
 
     async def initialize(self):
         if not os.path.exists(self.root_dir):
             os.makedirs(self.root_dir)
 
     async def get_tree(self) -> List[Dict]:
-        return await self._scan_directory(self.root_dir, None)
+        # Bounds how many directory listings run in worker threads at once
+        limit = asyncio.Semaphore(SCAN_CONCURRENCY)
+        return await self._scan_directory(self.root_dir, None, limit)
+
+    async def _scan_directory(self, dir_path: str, parent_id: Optional[str], limit: asyncio.Semaphore) -> List[Dict]:
+        # scandir/stat block, so each listing runs in a worker thread; sibling
+        # subdirectories are then scanned concurrently across threads.
+        async with limit:
+            nodes, subdirs = await asyncio.to_thread(self._list_directory, dir_path, parent_id)
 
-    async def _scan_directory(self, dir_path: str, parent_id: Optional[str]) -> List[Dict]:
+        children = await asyncio.gather(
+            *(self._scan_directory(path, node["id"], limit) for node, path in subdirs)
+        )
+        for (node, _), node_children in zip(subdirs, children):
+            node["children"] = node_children
+
+        return nodes
+
+    def _list_directory(self, dir_path: str, parent_id: Optional[str]) -> Tuple[List[Dict], List[Tuple[Dict, str]]]:
         nodes = []
+        subdirs = []
         try:
-            entries = os.scandir(dir_path)
-            for entry in entries:
-                if entry.name.startswith('.'):
-                    continue
-
-                full_path = entry.path
-                relative_path = os.path.relpath(full_path, self.root_dir).replace("\\", "/")
-                # Use relative path as ID
-                node_id = relative_path
-                
-                stats = entry.stat()
-                created_at = stats.st_ctime * 1000 # JS uses milliseconds
-
-                node = {
-                    "id": node_id,
-                    "parentId": parent_id,
-                    "title": entry.name.replace('.md', '') if entry.name.endswith('.md') else entry.name,
-                    "type": "doc" if entry.is_file() and entry.name.endswith('.md') else ("folder" if entry.is_dir() else None),
-                    "createdAt": created_at
-                }
-
-                if node["type"] == "doc":
-                    nodes.append(node)
-                elif entry.is_dir():
-                    # Top level folders are considered KBs if parent is root
-                    if parent_id is None:
-                        node["type"] = "kb"
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+
+                    # DirEntry caches the d_type, so these don't hit the disk;
+                    # unsupported entries are skipped before any stat call.
+                    if entry.is_dir(follow_symlinks=False):
+                        is_dir = True
+                    elif entry.is_file(follow_symlinks=False) and entry.name.endswith('.md'):
+                        is_dir = False
                     else:
-                        node["type"] = "folder"
+                        continue
+
+                    full_path = entry.path
+                    relative_path = os.path.relpath(full_path, self.root_dir).replace("\\", "/")
+                    # Use relative path as ID
+                    node_id = relative_path
                     
-                    node["children"] = await self._scan_directory(full_path, node_id)
+                    stats = entry.stat(follow_symlinks=False)
+                    created_at = stats.st_ctime * 1000 # JS uses milliseconds
+
+                    node = {
+                        "id": node_id,
+                        "parentId": parent_id,
+                        "title": entry.name.replace('.md', '') if entry.name.endswith('.md') else entry.name,
+                        "type": "doc",
+                        "createdAt": created_at
+                    }
+
+                    if is_dir:
+                        # Top level folders are considered KBs if parent is root
+                        node["type"] = "kb" if parent_id is None else "folder"
+                        subdirs.append((node, full_path))
                     nodes.append(node)
         except Exception as e:
             print(f"Error scanning {dir_path}: {e}")
             
-        return nodes
+        return nodes, subdirs
 
     async def read_file(self, relative_path: str) -> str:
         full_path = os.path.join(self.root_dir, relative_path)
         self._check_path_security(full_path)
         
-        async with aiofiles.open(full_path, mode='r', encoding='utf-8') as f:
-            return await f.read()
+        # open + read + close in a single thread hop
+        def _read() -> str:
+            with open(full_path, mode='r', encoding='utf-8') as f:
+                return f.read()
+
+        return await asyncio.to_thread(_read)
 
     async def write_file(self, relative_path: str, content: str) -> None:
         full_path = os.path.join(self.root_dir, relative_path)
         self._check_path_security(full_path)
         
-        async with aiofiles.open(full_path, mode='w', encoding='utf-8') as f:
-            await f.write(content)
+        await asyncio.to_thread(self._write_text, full_path, content)
 
     async def create_node(self, relative_path: str, node_type: str) -> None:
         full_path = os.path.join(self.root_dir, relative_path)
@@ -77,12 +104,16 @@ class FileSystemService:
             if not full_path.endswith('.md'):
                 full_path += '.md'
             # Create empty file
-            async with aiofiles.open(full_path, mode='w', encoding='utf-8') as f:
-                await f.write("")
+            await asyncio.to_thread(self._write_text, full_path, "")
         else:
             os.makedirs(full_path, exist_ok=True)
 
+    @staticmethod
+    def _write_text(full_path: str, content: str) -> None:
+        with open(full_path, mode='w', encoding='utf-8') as f:
+            f.write(content)
+
     def _check_path_security(self, full_path: str):
         # Basic security check to prevent directory traversal
-        if not os.path.abspath(full_path).startswith(os.path.abspath(self.root_dir)):
+        if not (os.path.abspath(full_path) + os.sep).startswith(self._abs_root):
             raise ValueError("Access denied")
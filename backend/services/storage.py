@@ -1,70 +1,85 @@
 from typing import List, Optional, Dict
 from sqlmodel import Session, select
+from sqlalchemy import func, text, update
 from models import Node, NodeCreate
-from database import engine
+import orjson
+import threading
 import uuid
 
+SEARCH_LIMIT = 50
+SNIPPET_LENGTH = 200
+
+def _node_dict(node) -> Dict:
+    # Shape shared with the frontend FileNode; accepts a Node or a result row
+    return {
+        "id": node.id,
+        "parentId": node.parent_id,
+        "title": node.title,
+        "type": node.type,
+        "createdAt": node.created_at,
+    }
+
 class StorageService:
     def __init__(self):
-        pass
-
-    def get_tree(self) -> List[Dict]:
-        with Session(engine) as session:
-            # Fetch all nodes
-            statement = select(Node)
-            results = session.exec(statement).all()
-            
-            # Build tree
-            nodes_by_id = {node.id: node for node in results}
-            tree = []
-            
-            # Map for children lookups if needed, but here we can just do a pass
-            # Since strict stricture requires nested children in return type
-            
-            # Helper to recursively build structure
-            def build_node_dict(node: Node) -> Dict:
-                node_dict = {
-                    "id": node.id,
-                    "parentId": node.parent_id,
-                    "title": node.title,
-                    "type": node.type,
-                    "createdAt": node.created_at,
-                }
-                
-                if node.type in ['kb', 'folder']:
-                    children = [
-                        build_node_dict(n) 
-                        for n in results 
-                        if n.parent_id == node.id
-                    ]
-                    node_dict["children"] = children
-                    
-                return node_dict
-
-            # Top level items (parent_id is None)
-            for node in results:
-                if node.parent_id is None:
-                    tree.append(build_node_dict(node))
-            
-            return tree
-
-    def read_node(self, node_id: str) -> Optional[str]:
-        with Session(engine) as session:
-            node = session.get(Node, node_id)
-            if not node:
-                raise ValueError("Node not found")
-            return node.content or ""
-
-    def save_node_content(self, node_id: str, content: str) -> None:
-        with Session(engine) as session:
-            node = session.get(Node, node_id)
-            if not node:
-                raise ValueError("Node not found")
-            node.content = content
-            session.add(node)
-            session.commit()
-
-    def create_node(self, parent_id: Optional[str], type: str, title: str = "New Node") -> Node:
+        # Serialized tree, dropped whenever a mutation changes the structure
+        self._tree_cache: Optional[bytes] = None
+        self._tree_version = 0
+        self._instance_id = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+
+    @property
+    def tree_etag(self) -> str:
+        # Instance id keeps ETags from colliding across server restarts
+        return f'"{self._instance_id}-{self._tree_version}"'
+
+    def _invalidate_tree(self) -> None:
+        with self._lock:
+            self._tree_cache = None
+            self._tree_version += 1
+
+    def get_tree_json(self, session: Session) -> bytes:
+        with self._lock:
+            if self._tree_cache is None:
+                self._tree_cache = orjson.dumps(self._build_tree(session))
+            return self._tree_cache
+
+    def _build_tree(self, session: Session) -> List[Dict]:
+        # Plain column rows (content skipped, no ORM hydration); dicts are
+        # built in Python so createdAt keeps full float precision
+        statement = select(Node.id, Node.parent_id, Node.title, Node.type, Node.created_at)
+        nodes = [_node_dict(row) for row in session.exec(statement).all()]
+
+        # Bucket nodes by parent once so each child lookup is O(1)
+        children_map: Dict[Optional[str], List[Dict]] = {}
+        for node in nodes:
+            children_map.setdefault(node["parentId"], []).append(node)
+
+        # Nesting is just attaching the shared child lists, no recursion
+        for node in nodes:
+            if node["type"] in ['kb', 'folder']:
+                node["children"] = children_map.get(node["id"], [])
+
+        return children_map.get(None, [])
+
+    def read_node(self, session: Session, node_id: str) -> Optional[str]:
+        node = session.get(Node, node_id)
+        if not node:
+            raise ValueError("Node not found")
+        return node.content or ""
+
+    def save_node_content(self, session: Session, node_id: str, content: str) -> None:
+        # Single UPDATE; no SELECT of the old content just to detect a 404
+        statement = (
+            update(Node)
+            .where(Node.id == node_id)
+            .values(content=content)
+            .returning(Node.id)
+        )
+        if session.exec(statement).first() is None:
+            raise ValueError("Node not found")
+        session.commit()
+
+    def create_node(self, session: Session, parent_id: Optional[str], type: str, title: str = "New Node") -> Dict:
         # Determine title based on type and existing count if needed, 
         # or simplified logic from frontend request
         
@@ -77,66 +92,86 @@ class StorageService:
         # The current Frontend 'createNode' sends 'path' which is the ID in the FS version.
         # In DB version, ID is UUID.
         
-        with Session(engine) as session:
-            new_node = Node(
-                id=str(uuid.uuid4()),
-                title=title,
-                type=type,
-                parent_id=parent_id,
-                content="" if type == 'doc' else None
+        # id and created_at are set client-side, so the in-memory object is
+        # complete without a refresh (sessions don't expire on commit).
+        new_node = Node(
+            id=str(uuid.uuid4()),
+            title=title,
+            type=type,
+            parent_id=parent_id,
+            content="" if type == 'doc' else None
+        )
+        session.add(new_node)
+        session.commit()
+        self._invalidate_tree()
+        return _node_dict(new_node)
+
+    def delete_node(self, session: Session, node_id: str) -> None:
+        # Recursive delete: collect the subtree with a recursive CTE and
+        # remove it in a single statement (parent_id is indexed).
+        # No FK relationship is declared in models.py, so ON DELETE CASCADE
+        # isn't available here.
+        statement = text(
+            """
+            WITH RECURSIVE subtree(id) AS (
+                SELECT id FROM node WHERE id = :root
+                UNION ALL
+                SELECT n.id FROM node n JOIN subtree ON n.parent_id = subtree.id
             )
-            session.add(new_node)
-            session.commit()
-            session.refresh(new_node)
-            return new_node
-
-    def delete_node(self, node_id: str) -> None:
-        with Session(engine) as session:
-            # Recursive delete
-            # 1. Get all nodes
-            # 2. Find descendants
-            # 3. Delete all
-            
-            # Optimization: for sqlite with correct FK, ON DELETE CASCADE works if configured.
-            # But here we didn't configure explicit relationships in models.py (just parent_id field).
-            # So manual cascade is safer.
-            
-            nodes = session.exec(select(Node)).all()
-            
-            to_delete = {node_id}
-            # Simple iterative expansion
-            added = True
-            while added:
-                added = False
-                for node in nodes:
-                    if node.parent_id in to_delete and node.id not in to_delete:
-                        to_delete.add(node.id)
-                        added = True
-            
-            for nid in to_delete:
-                n = session.get(Node, nid)
-                if n:
-                    session.delete(n)
-            
-            session.commit()
-
-    def rename_node(self, node_id: str, new_title: str) -> Node:
-        with Session(engine) as session:
-            node = session.get(Node, node_id)
-            if not node:
-                raise ValueError("Node not found")
-            node.title = new_title
-            session.add(node)
-            session.commit()
-            session.refresh(node)
-            return node
-
-    def search_nodes(self, query: str) -> List[Node]:
-        with Session(engine) as session:
-            # Search title or content
-            statement = select(Node).where(
+            DELETE FROM node WHERE id IN subtree
+            """
+        ).bindparams(root=node_id)
+        session.exec(statement)
+        session.commit()
+        self._invalidate_tree()
+
+    def rename_node(self, session: Session, node_id: str, new_title: str) -> Dict:
+        statement = (
+            update(Node)
+            .where(Node.id == node_id)
+            .values(title=new_title)
+            .returning(Node.id, Node.parent_id, Node.title, Node.type, Node.created_at)
+        )
+        row = session.exec(statement).first()
+        if row is None:
+            raise ValueError("Node not found")
+        session.commit()
+        self._invalidate_tree()
+        return _node_dict(row)
+
+    def search_nodes(self, session: Session, query: str) -> List[Dict]:
+        # Only the columns the search UI shows; content is cut down to a
+        # short preview so large documents aren't shipped whole.
+        # Trigram FTS needs at least 3 characters; shorter queries fall
+        # back to a plain LIKE scan over title or content.
+        if len(query) < 3:
+            statement = select(
+                Node.id,
+                Node.parent_id,
+                Node.title,
+                Node.type,
+                Node.created_at,
+                func.substr(Node.content, 1, SNIPPET_LENGTH).label("snippet"),
+            ).where(
                 (Node.title.contains(query)) | 
                 (Node.content.contains(query))
-            )
-            results = session.exec(statement).all()
-            return results
+            ).limit(SEARCH_LIMIT)
+            rows = session.exec(statement).all()
+        else:
+            # Quote the query as a single FTS5 phrase so user input can't
+            # be parsed as MATCH syntax.
+            phrase = '"' + query.replace('"', '""') + '"'
+            statement = text(
+                """
+                SELECT node.id, node.parent_id, node.title, node.type, node.created_at,
+                       substr(node.content, 1, :snippet_length) AS snippet
+                FROM node_fts
+                JOIN node ON node.rowid = node_fts.rowid
+                WHERE node_fts MATCH :q
+                ORDER BY bm25(node_fts)
+                LIMIT :limit
+                """
+            ).bindparams(q=phrase, snippet_length=SNIPPET_LENGTH, limit=SEARCH_LIMIT)
+            rows = session.exec(statement).all()
+
+        return [{**_node_dict(row), "content": row.snippet} for row in rows]